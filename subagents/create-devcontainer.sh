@@ -155,7 +155,7 @@ case "$COMMAND" in
         print_color $BLUE "Creating development container '$PROJECT_NAME'..."
         RESULT=$(python3 "$PYTHON_AGENT" create "$PROJECT_NAME" "$VMID" "$TEMPLATE_TYPE")
         
-        if echo "$RESULT" | grep -q '"success": true'; then
+        if echo "$RESULT" | python3 -c "import sys, json; sys.exit(0 if json.load(sys.stdin).get('success') else 1)" 2>/dev/null; then
             VMID=$(echo "$RESULT" | python3 -c "import sys, json; print(json.load(sys.stdin).get('vmid', 'unknown'))")
             IP=$(echo "$RESULT" | python3 -c "import sys, json; print(json.load(sys.stdin).get('ip', 'pending'))")
             
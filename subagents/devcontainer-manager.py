@@ -14,108 +14,311 @@ This agent handles:
 
 import os
 import sys
+import copy
 import json
 import subprocess
 import re
+import shlex
+import shutil
+import stat
 import time
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pct list rows: VMID, status, optional lock, name
+_LIST_RE = re.compile(r'^\s*(\d+)\s+(\S+)\s+(?:\S+\s+)?(\S+)\s*$', re.M)
+_VMID_RE = re.compile(r'^\s*(\d+)', re.M)
+_SECTION_SEP = "__SEP__"
+_MEM_CMD = "free -h | awk '/^Mem:/ {print $3 \"/\" $2}'"
+_DISK_CMD = "df -h / | tail -1 | awk '{print $3 \"/\" $2 \" (\" $5 \" used)\"}'"
+# SSH control sockets live in a private directory, never in world-writable /tmp
+_SSH_CONTROL_DIR = "/run/devcontainer"
+
+def _ssh_control_path(vmid: str) -> Optional[str]:
+    """Return the control socket path for a container, or None if the directory is unsafe."""
+    try:
+        os.makedirs(_SSH_CONTROL_DIR, mode=0o700, exist_ok=True)
+        st = os.lstat(_SSH_CONTROL_DIR)
+    except OSError:
+        return None
+    # Refuse a directory another user could have planted sockets in
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    return os.path.join(_SSH_CONTROL_DIR, f"lxc-{vmid}.sock")
+
+# Commands go to the control master only. This host never resolves, so a dead
+# master makes ssh fail (255) instead of opening an unmultiplexed connection.
+_SSH_MUX_TARGET = "developer@lxc-{vmid}.invalid"
+# Seconds before SSH is tried again for a container that could not be reached
+_SSH_RETRY_AFTER = 30.0
+
+@lru_cache(maxsize=None)
+def _resolve_executable(name: str) -> str:
+    """Return the absolute path of an executable, or the name if not found."""
+    return shutil.which(name) or name
+
 class DevContainerManager:
     """Manages LXC development containers with OpenCode."""
     
-    def __init__(self):
+    # Packages, services and ports installed by setup_project_template
+    TEMPLATE_CONFIGS = {
+        'web': {
+            'packages': ['chromium', 'lighttpd'],
+            'npm_packages': ['postman-cli'],
+            'ports': [3000, 5173, 4173]
+        },
+        'api': {
+            'packages': ['postgresql-client', 'redis-tools'],
+            'npm_packages': ['nodemon', 'typescript'],
+            'services': ['postgres', 'redis'],
+            'ports': [3000, 8080, 9229]
+        },
+        'ml': {
+            'packages': ['python3-torch', 'python3-jupyter'],
+            'python_packages': ['scikit-learn', 'pandas', 'matplotlib'],
+            'ports': [8888],
+            'setup_script': 'jupyter_setup.sh'
+        },
+        'devops': {
+            'packages': ['terraform', 'ansible', 'kubectl'],
+            'services': ['docker-registry'],
+            'ports': [6443, 8080]
+        }
+    }
+    
+    def __init__(self, use_ssh: Optional[bool] = None):
         self.base_dir = Path("/opt/lxc-dev-template")
         self.template_id = "9000"
-        
-    def run_command(self, command: str, capture_output: bool = True) -> Tuple[int, str, str]:
-        """Execute shell command and return result."""
+        self._pct_list_cache = (None, 0.0)
+        
+        # Optional SSH transport for in-container commands (see _exec_in)
+        if use_ssh is None:
+            use_ssh = os.environ.get("DEVCONTAINER_SSH") == "1"
+        self.use_ssh = use_ssh
+        self._ssh_masters = set()
+        self._ssh_unavailable: Dict[str, float] = {}
+        
+    def run_command(self, command: Union[str, List[str]], capture_output: bool = True,
+                    timeout: Optional[float] = 30) -> Tuple[int, str, str]:
+        """Execute command and return result.
+        
+        Strings are run through the shell; argv lists are executed directly.
+        A timeout of None waits for the command to finish however long it takes.
+        
+        For argv lists the executable is resolved to an absolute path and
+        close_fds is off, so CPython spawns the child with posix_spawn
+        instead of fork. Our own descriptors are non-inheritable by default.
+        """
+        shell = isinstance(command, str)
+        if not shell:
+            command = [_resolve_executable(command[0])] + command[1:]
         try:
             if capture_output:
                 result = subprocess.run(
                     command, 
-                    shell=True, 
+                    shell=shell, 
                     capture_output=True, 
                     text=True,
-                    timeout=30
+                    timeout=timeout,
+                    check=False,
+                    close_fds=shell
                 )
                 return result.returncode, result.stdout, result.stderr
             else:
-                process = subprocess.Popen(command, shell=True)
-                return process.wait(), "", ""
+                process = subprocess.Popen(command, shell=shell, close_fds=shell)
+                try:
+                    return process.wait(timeout=timeout), "", ""
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+                    raise
         except subprocess.TimeoutExpired:
             return -1, "", "Command timed out"
         except Exception as e:
             return -1, "", str(e)
     
+    def _pct_list(self, ttl: float = 1.0) -> Tuple[int, str, str]:
+        """Run `pct list`, reusing output younger than ttl seconds."""
+        cached, fetched_at = self._pct_list_cache
+        now = time.monotonic()
+        if cached is not None and now - fetched_at < ttl:
+            return 0, cached, ""
+        
+        returncode, stdout, stderr = self.run_command(["pct", "list"])
+        if returncode == 0:
+            self._pct_list_cache = (stdout, now)
+        return returncode, stdout, stderr
+    
+    def _get_container_ip(self, vmid: str, timeout: Optional[float] = 30) -> str:
+        """Return the eth0 IPv4 address of a running container, or ""."""
+        ip_cmd = ["pct", "exec", vmid, "--", "ip", "-j", "-4", "addr", "show", "eth0"]
+        returncode, ip_out, _ = self.run_command(ip_cmd, timeout=timeout)
+        if returncode != 0:
+            return ""
+        return self._parse_ip(ip_out)
+    
+    @staticmethod
+    def _parse_ip(ip_out: str) -> str:
+        """Extract the first IPv4 address from `ip -j -4 addr` output."""
+        try:
+            return json.loads(ip_out)[0]["addr_info"][0]["local"]
+        except (ValueError, LookupError, TypeError):
+            return ""
+    
+    def _ssh_master(self, vmid: str) -> bool:
+        """Make sure a control master to the container is running, opening one if needed."""
+        control_path = _ssh_control_path(vmid)
+        if not control_path or not shutil.which("ssh"):
+            return False
+        
+        # A master left by an earlier run may still be alive (ControlPersist).
+        # The mux answers through the socket alone, so no IP lookup is needed.
+        check_cmd = ["ssh", "-S", control_path, "-O", "check", _SSH_MUX_TARGET.format(vmid=vmid)]
+        if self.run_command(check_cmd, timeout=5)[0] == 0:
+            return True
+        
+        ip = self._get_container_ip(vmid)
+        if not ip:
+            return False
+        
+        # Start a detached master; its stdio must not hold our pipes open
+        try:
+            returncode = subprocess.run(
+                ["ssh", "-M", "-N", "-f", "-S", control_path,
+                 "-o", "ControlPersist=60s", "-o", "BatchMode=yes",
+                 "-o", "ConnectTimeout=2", "-o", "StrictHostKeyChecking=accept-new",
+                 f"developer@{ip}"],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=10
+            ).returncode
+        except (subprocess.TimeoutExpired, OSError):
+            return False
+        return returncode == 0
+    
+    def _exec_in(self, vmid: str, script: str, timeout: Optional[float] = 30) -> Tuple[int, str, str]:
+        """Run a shell script inside the container.
+        
+        With use_ssh the script goes over a multiplexed SSH connection as the
+        developer user, avoiding a fresh pct exec per call. A master that
+        expired since the last call is reopened once; if SSH still fails the
+        container falls back to pct exec for _SSH_RETRY_AFTER seconds.
+        """
+        if self.use_ssh and self._ssh_unavailable.get(vmid, 0.0) <= time.monotonic():
+            # A master used before is tried directly; if it expired meanwhile
+            # the command fails with 255 and the master is reopened once
+            known = vmid in self._ssh_masters
+            while True:
+                if not known:
+                    if not self._ssh_master(vmid):
+                        break
+                    self._ssh_masters.add(vmid)
+                ssh_cmd = ["ssh", "-S", _ssh_control_path(vmid), "-o", "ControlMaster=no",
+                           "-o", "BatchMode=yes", _SSH_MUX_TARGET.format(vmid=vmid),
+                           f"sh -c {shlex.quote(script)}"]
+                result = self.run_command(ssh_cmd, timeout=timeout)
+                # 255 means ssh itself failed rather than the script
+                if result[0] != 255:
+                    return result
+                self._ssh_masters.discard(vmid)
+                if not known:
+                    break
+                known = False
+            self._ssh_unavailable[vmid] = time.monotonic() + _SSH_RETRY_AFTER
+        
+        return self.run_command(["pct", "exec", vmid, "--", "sh", "-c", script], timeout=timeout)
+    
+    def _exec_sections(self, vmid: str, commands: List[str]) -> List[str]:
+        """Run several commands in one container call and return each one's output."""
+        script = f"; echo {_SECTION_SEP}; ".join(commands)
+        _, out, _ = self._exec_in(vmid, script)
+        sections = [section.strip() for section in out.split(f"{_SECTION_SEP}\n")]
+        return sections + [""] * (len(commands) - len(sections))
+    
+    def _wait_for_ip(self, vmid: str, timeout: float = 30, interval: float = 0.5) -> str:
+        """Poll until the container has an IP; return "pending" after timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            # Never let a single probe run past the deadline
+            ip = self._get_container_ip(vmid, timeout=max(0.1, deadline - time.monotonic()))
+            if ip:
+                return ip
+            if time.monotonic() >= deadline:
+                return "pending"
+            time.sleep(interval)
+    
+    def wait_until_ready(self, vmid: str, timeout: float = 60, interval: float = 0.5) -> bool:
+        """Poll until commands can be executed in the container."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = max(0.1, deadline - time.monotonic())
+            if self.run_command(["pct", "exec", vmid, "--", "true"], timeout=remaining)[0] == 0:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+    
     def list_containers(self) -> List[Dict]:
         """List all development containers."""
-        returncode, stdout, stderr = self.run_command("pct list")
+        returncode, stdout, stderr = self._pct_list()
         if returncode != 0:
             return []
         
-        containers = []
-        for line in stdout.strip().split('\n'):
-            if re.match(r'^\d+', line):
-                parts = line.split()
-                if len(parts) >= 3:
-                    vmid = parts[0]
-                    status = parts[1]
-                    name = parts[2] if len(parts) > 2 else ""
-                    
-                    # Skip template itself
-                    if vmid == self.template_id:
-                        continue
-                    
-                    # Get IP if running
-                    ip = ""
-                    if status == "running":
-                        ip_cmd = f"pct exec {vmid} -- ip addr show eth0 2>/dev/null | grep 'inet ' | awk '{{print $2}}' | cut -d/ -f1"
-                        _, ip_out, _ = self.run_command(ip_cmd)
-                        ip = ip_out.strip()
-                    
-                    containers.append({
-                        'vmid': vmid,
-                        'name': name,
-                        'status': status,
-                        'ip': ip
-                    })
-        
-        return containers
+        # Parse VMID/status/name rows, skipping the template itself
+        template_id = self.template_id
+        rows = [row for row in _LIST_RE.findall(stdout) if row[0] != template_id]
+        
+        # Look up IPs of running containers concurrently
+        running = [vmid for vmid, status, _ in rows if status == "running"]
+        ips = {}
+        if running:
+            with ThreadPoolExecutor(max_workers=min(16, len(running))) as executor:
+                ips = dict(zip(running, executor.map(self._get_container_ip, running)))
+        
+        return [
+            {'vmid': vmid, 'name': name, 'status': status, 'ip': ips.get(vmid, "")}
+            for vmid, status, name in rows
+        ]
     
     def create_container(self, project_name: str, vmid: Optional[str] = None, 
                      template_type: str = "default") -> Dict:
         """Create new development container."""
         # Generate VMID if not provided
         if not vmid:
-            for i in range(1001, 9999):
-                check_cmd = f"pct list | grep -q '^{i}'"
-                if self.run_command(check_cmd)[0] != 0:
-                    vmid = str(i)
-                    break
+            returncode, stdout, stderr = self._pct_list()
+            if returncode != 0:
+                return {'success': False, 'error': stderr}
+            used = {int(v) for v in _VMID_RE.findall(stdout)}
+            vmid = next((str(i) for i in range(1001, 9999) if i not in used), None)
         
         if not vmid:
             return {'success': False, 'error': 'No available VMID found'}
         
         # Clone template
-        clone_cmd = f"pct clone {self.template_id} {vmid} --hostname {project_name}"
+        clone_cmd = ["pct", "clone", self.template_id, vmid, "--hostname", project_name]
         returncode, stdout, stderr = self.run_command(clone_cmd)
+        self._pct_list_cache = (None, 0.0)
         
         if returncode != 0:
             return {'success': False, 'error': stderr}
         
         # Start container
-        start_cmd = f"pct start {vmid}"
+        start_cmd = ["pct", "start", vmid]
         returncode, _, stderr = self.run_command(start_cmd)
         
         if returncode != 0:
             return {'success': False, 'error': stderr}
         
         # Wait for IP
-        time.sleep(10)
-        ip_cmd = f"pct exec {vmid} -- ip addr show eth0 2>/dev/null | grep 'inet ' | awk '{{print $2}}' | cut -d/ -f1"
-        _, ip_out, _ = self.run_command(ip_cmd)
-        ip = ip_out.strip() or "pending"
+        ip = self._wait_for_ip(vmid)
         
         return {
             'success': True,
@@ -131,15 +334,17 @@ class DevContainerManager:
     def configure_opencode(self, vmid: str, providers: List[str] = None) -> Dict:
         """Configure OpenCode in container."""
         if providers:
-            # Configure providers
+            # Configure providers one at a time; they all write the developer
+            # user's single credentials file
             for provider in providers:
-                auth_cmd = f"pct exec {vmid} -- su - developer -c 'opencode auth login --provider {provider}'"
+                auth_cmd = ["pct", "exec", vmid, "--", "su", "-", "developer", "-c",
+                            f"opencode auth login --provider {shlex.quote(provider)}"]
                 returncode, _, stderr = self.run_command(auth_cmd)
                 if returncode != 0:
                     return {'success': False, 'error': f'Failed to configure {provider}: {stderr}'}
         
         # Test OpenCode
-        test_cmd = f"pct exec {vmid} -- su - developer -c 'opencode --version'"
+        test_cmd = ["pct", "exec", vmid, "--", "su", "-", "developer", "-c", "opencode --version"]
         returncode, version_out, stderr = self.run_command(test_cmd)
         
         return {
@@ -150,31 +355,26 @@ class DevContainerManager:
     
     def get_container_info(self, vmid: str) -> Dict:
         """Get detailed container information."""
-        # Status and IP
-        status_cmd = f"pct status {vmid}"
+        # Status
+        status_cmd = ["pct", "status", vmid]
         _, status_out, _ = self.run_command(status_cmd)
-        status = status_out.strip().split('\n')[0].split()[-1] if status_out else "unknown"
-        
-        ip = ""
-        if status == "running":
-            ip_cmd = f"pct exec {vmid} -- ip addr show eth0 2>/dev/null | grep 'inet ' | awk '{{print $2}}' | cut -d/ -f1"
-            _, ip_out, _ = self.run_command(ip_cmd)
-            ip = ip_out.strip()
+        first_line, _, _ = status_out.strip().partition('\n')
+        status = first_line.rstrip().rpartition(' ')[2] or "unknown"
         
         # Configuration
-        config_cmd = f"pct config {vmid}"
+        config_cmd = ["pct", "config", vmid]
         _, config_out, _ = self.run_command(config_cmd)
         
-        # Resource usage if running
+        # IP and resource usage if running, fetched in a single pct exec
+        ip = ""
         resources = {}
         if status == "running":
-            mem_cmd = f"pct exec {vmid} -- free -h | grep '^Mem:' | awk '{{print \$3 \"/\" \$2}}'"
-            _, mem_out, _ = self.run_command(mem_cmd)
-            resources['memory'] = mem_out.strip() if mem_out else "N/A"
-            
-            disk_cmd = f"pct exec {vmid} -- df -h / | tail -1 | awk '{{print \$3 \"/\" \$2 \" (\" \$5 \" used)\"}}'"
-            _, disk_out, _ = self.run_command(disk_cmd)
-            resources['disk'] = disk_out.strip() if disk_out else "N/A"
+            ip_out, mem_out, disk_out = self._exec_sections(vmid, [
+                "ip -j -4 addr show eth0 2>/dev/null", _MEM_CMD, _DISK_CMD
+            ])
+            ip = self._parse_ip(ip_out)
+            resources['memory'] = mem_out or "N/A"
+            resources['disk'] = disk_out or "N/A"
         
         return {
             'vmid': vmid,
@@ -184,91 +384,90 @@ class DevContainerManager:
             'resources': resources
         }
     
-    def setup_project_template(self, vmid: str, template_type: str) -> Dict:
-        """Apply project template to container."""
-        template_configs = {
-            'web': {
-                'packages': ['chromium', 'lighttpd'],
-                'npm_packages': ['postman-cli'],
-                'ports': [3000, 5173, 4173]
-            },
-            'api': {
-                'packages': ['postgresql-client', 'redis-tools'],
-                'npm_packages': ['nodemon', 'typescript'],
-                'services': ['postgres', 'redis'],
-                'ports': [3000, 8080, 9229]
-            },
-            'ml': {
-                'packages': ['python3-torch', 'python3-jupyter'],
-                'python_packages': ['scikit-learn', 'pandas', 'matplotlib'],
-                'ports': [8888],
-                'setup_script': 'jupyter_setup.sh'
-            },
-            'devops': {
-                'packages': ['terraform', 'ansible', 'kubectl'],
-                'services': ['docker-registry'],
-                'ports': [6443, 8080]
+    def list_containers_with_info(self) -> List[Dict]:
+        """List all development containers with their detailed information.
+        
+        Status and IP come from the list pass, so each container only adds
+        a pct config and, when running, one pct exec for resource usage.
+        """
+        containers = self.list_containers()
+        if not containers:
+            return []
+        
+        def info_one(container: Dict) -> Dict:
+            vmid = container['vmid']
+            _, config_out, _ = self.run_command(["pct", "config", vmid])
+            resources = {}
+            if container['status'] == "running":
+                mem_out, disk_out = self._exec_sections(vmid, [_MEM_CMD, _DISK_CMD])
+                resources['memory'] = mem_out or "N/A"
+                resources['disk'] = disk_out or "N/A"
+            return {
+                'vmid': vmid,
+                'status': container['status'],
+                'ip': container['ip'],
+                'config': config_out.strip() if config_out else "",
+                'resources': resources
             }
-        }
         
-        config = template_configs.get(template_type, {})
+        with ThreadPoolExecutor(max_workers=min(16, len(containers))) as executor:
+            infos = list(executor.map(info_one, containers))
         
-        # Install packages
+        return [dict(container, info=info) for container, info in zip(containers, infos)]
+    
+    def setup_project_template(self, vmid: str, template_type: str) -> Dict:
+        """Apply project template to container."""
+        config = self.TEMPLATE_CONFIGS.get(template_type, {})
+        
+        # Build one install script so the container is entered only once;
+        # set -e aborts on the first failing step
+        steps = []
         if 'packages' in config:
-            pkg_list = ' '.join(config['packages'])
-            install_cmd = f"pct exec {vmid} -- apt install -y {pkg_list}"
-            returncode, _, stderr = self.run_command(install_cmd)
-            if returncode != 0:
-                return {'success': False, 'error': f'Package install failed: {stderr}'}
+            steps.append(f"apt-get install -y {' '.join(config['packages'])}")
         
-        # Install npm packages
+        # npm and pip installs run as the developer user in a single login shell
+        user_steps = []
         if 'npm_packages' in config:
-            for pkg in config['npm_packages']:
-                npm_cmd = f"pct exec {vmid} -- su - developer -c 'npm install -g {pkg}'"
-                returncode, _, stderr = self.run_command(npm_cmd)
-                if returncode != 0:
-                    return {'success': False, 'error': f'NPM install failed: {stderr}'}
-        
-        # Install Python packages
+            user_steps.append(f"npm install -g {' '.join(config['npm_packages'])}")
         if 'python_packages' in config:
-            pkg_list = ' '.join(config['python_packages'])
-            pip_cmd = f"pct exec {vmid} -- su - developer -c 'pip install {pkg_list}'"
-            returncode, _, stderr = self.run_command(pip_cmd)
+            user_steps.append(f"pip install {' '.join(config['python_packages'])}")
+        if user_steps:
+            steps.append(f"su - developer -c {shlex.quote(' && '.join(user_steps))}")
+        
+        if steps:
+            script = "set -e; " + "; ".join(steps)
+            returncode, _, stderr = self.run_command(["pct", "exec", vmid, "--", "sh", "-c", script], timeout=600)
             if returncode != 0:
-                return {'success': False, 'error': f'Pip install failed: {stderr}'}
+                return {'success': False, 'error': f'Template install failed: {stderr}'}
         
         return {
             'success': True,
             'template': template_type,
-            'installed': config
+            'installed': copy.deepcopy(config)
         }
     
     def monitor_resources(self, vmid: str) -> Dict:
         """Get current resource usage."""
-        status_cmd = f"pct status {vmid}"
+        status_cmd = ["pct", "status", vmid]
         _, status_out, _ = self.run_command(status_cmd)
-        status = status_out.strip().split('\n')[0].split()[-1] if status_out else "unknown"
+        first_line, _, _ = status_out.strip().partition('\n')
+        status = first_line.rstrip().rpartition(' ')[2] or "unknown"
         
         if status != "running":
             return {'status': status, 'message': 'Container not running'}
         
-        # CPU and Memory
-        top_cmd = f"pct exec {vmid} -- top -bn1 | head -5"
-        _, top_out, _ = self.run_command(top_cmd)
-        
-        # Memory details
-        mem_cmd = f"pct exec {vmid} -- free -h"
-        _, mem_out, _ = self.run_command(mem_cmd)
-        
-        # Disk usage
-        disk_cmd = f"pct exec {vmid} -- df -h"
-        _, disk_out, _ = self.run_command(disk_cmd)
+        # CPU, memory and disk usage in a single pct exec
+        top_out, mem_out, disk_out = self._exec_sections(vmid, [
+            "top -bn1 | head -5",
+            "free -h",
+            "df -h"
+        ])
         
         return {
             'status': status,
-            'cpu_usage': top_out.strip() if top_out else "N/A",
-            'memory_info': mem_out.strip() if mem_out else "N/A",
-            'disk_info': disk_out.strip() if disk_out else "N/A"
+            'cpu_usage': top_out or "N/A",
+            'memory_info': mem_out or "N/A",
+            'disk_info': disk_out or "N/A"
         }
     
     def backup_container(self, vmid: str) -> Dict:
@@ -276,8 +475,8 @@ class DevContainerManager:
         timestamp = time.strftime("%Y%m%d-%H%M%S")
         backup_name = f"lxc-{vmid}-{timestamp}"
         
-        backup_cmd = f"vzdump {vmid} --compress zstd --storage local-lvm --mode snapshot"
-        returncode, stdout, stderr = self.run_command(backup_cmd, capture_output=False)
+        backup_cmd = ["vzdump", vmid, "--compress", "zstd", "--storage", "local-lvm", "--mode", "snapshot"]
+        returncode, stdout, stderr = self.run_command(backup_cmd, capture_output=False, timeout=None)
         
         return {
             'success': returncode == 0,
@@ -301,6 +500,9 @@ def main():
         if action == "list":
             result = manager.list_containers()
         
+        elif action == "list-detail":
+            result = manager.list_containers_with_info()
+        
         elif action == "create":
             if len(sys.argv) < 3:
                 result = {'error': 'Usage: create <project_name> [vmid] [template_type]'}
@@ -346,7 +548,7 @@ def main():
             result = {
                 'error': f'Unknown action: {action}',
                 'available_actions': [
-                    'list', 'create', 'info', 'configure-opencode', 
+                    'list', 'list-detail', 'create', 'info', 'configure-opencode', 
                     'setup-template', 'monitor', 'backup'
                 ]
             }
@@ -354,7 +556,13 @@ def main():
     except Exception as e:
         result = {'error': str(e)}
     
-    print(json.dumps(result, indent=2, default=str))
+    # Pretty-print for humans; emit compact JSON when another program reads it
+    if sys.stdout.isatty():
+        print(json.dumps(result, indent=2, default=str))
+    elif orjson is not None:
+        print(orjson.dumps(result, default=str).decode())
+    else:
+        print(json.dumps(result, separators=(',', ':'), default=str))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1 @@
+devcontainer-manager.py
\ No newline at end of file
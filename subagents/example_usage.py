@@ -7,18 +7,18 @@ Demonstrates how to integrate the agent into automated workflows.
 import sys
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add agent to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-def example_basic_container_creation():
+from devcontainer_manager import DevContainerManager
+
+def example_basic_container_creation(manager):
     """Example: Create a basic development container."""
     print("=== Basic Container Creation Example ===")
     
-    from devcontainer_manager import DevContainerManager
-    manager = DevContainerManager()
-    
     # Create a web development container
     result = manager.create_container(
         project_name="example-web-app",
@@ -34,13 +34,10 @@ def example_basic_container_creation():
     
     return result
 
-def example_opencode_setup():
+def example_opencode_setup(manager):
     """Example: Configure OpenCode with multiple providers."""
     print("\n=== OpenCode Configuration Example ===")
     
-    from devcontainer_manager import DevContainerManager
-    manager = DevContainerManager()
-    
     # Configure with Anthropic and OpenAI
     vmid = "1001"  # Assuming container exists
     result = manager.configure_opencode(
@@ -56,13 +53,10 @@ def example_opencode_setup():
     
     return result
 
-def example_project_template_application():
+def example_project_template_application(manager):
     """Example: Apply machine learning template."""
     print("\n=== ML Template Application Example ===")
     
-    from devcontainer_manager import DevContainerManager
-    manager = DevContainerManager()
-    
     # Apply ML template
     vmid = "1001"
     result = manager.setup_project_template(
@@ -81,13 +75,10 @@ def example_project_template_application():
     
     return result
 
-def example_resource_monitoring():
+def example_resource_monitoring(manager):
     """Example: Continuous resource monitoring."""
     print("\n=== Resource Monitoring Example ===")
     
-    from devcontainer_manager import DevContainerManager
-    manager = DevContainerManager()
-    
     vmid = "1001"
     print(f"Monitoring container {vmid} for 10 seconds...")
     
@@ -108,13 +99,10 @@ def example_resource_monitoring():
     
     return result
 
-def example_automated_workflow():
+def example_automated_workflow(manager):
     """Example: Complete automated workflow setup."""
     print("\n=== Automated Workflow Example ===")
     
-    from devcontainer_manager import DevContainerManager
-    manager = DevContainerManager()
-    
     # Step 1: Create container
     print("Step 1: Creating API development container...")
     create_result = manager.create_container(
@@ -131,7 +119,9 @@ def example_automated_workflow():
     
     # Step 2: Wait for container to be ready
     print("Step 2: Waiting for container to be ready...")
-    time.sleep(10)
+    if not manager.wait_until_ready(vmid):
+        print(f"❌ Container {vmid} did not become ready")
+        return {'success': False, 'error': f'Container {vmid} did not become ready'}
     
     # Step 3: Apply project template
     print("Step 3: Applying API template...")
@@ -174,22 +164,17 @@ def example_automated_workflow():
     
     return summary
 
-def example_container_list_and_analysis():
+def example_container_list_and_analysis(manager):
     """Example: List containers and analyze status."""
     print("\n=== Container Analysis Example ===")
     
-    from devcontainer_manager import DevContainerManager
-    manager = DevContainerManager()
-    
     # Get all containers
-    result = manager.list_containers()
+    containers = manager.list_containers()
     
-    if not result:
+    if not containers:
         print("❌ Failed to list containers")
         return
     
-    containers = result['containers']
-    
     # Analysis
     total_containers = len(containers)
     running_containers = len([c for c in containers if c['status'] == 'running'])
@@ -216,30 +201,37 @@ def example_container_list_and_analysis():
         'containers': containers
     }
 
-def example_backup_management():
-    """Example: Automated backup workflow."""
+def example_backup_management(manager, max_workers=1):
+    """Example: Automated backup workflow.
+    
+    vzdump holds the node-wide /var/run/vzdump.lock while it runs, so
+    backups on one Proxmox node execute one at a time whatever max_workers
+    is. Extra workers only queue on that lock and fail once vzdump's
+    lockwait expires; raise max_workers only together with lockwait.
+    """
     print("\n=== Backup Management Example ===")
     
-    from devcontainer_manager import DevContainerManager
-    manager = DevContainerManager()
-    
     # Get running containers
-    containers_result = manager.list_containers()
-    containers = containers_result.get('containers', [])
+    containers = manager.list_containers()
     running_containers = [c for c in containers if c['status'] == 'running']
     
     if not running_containers:
         print("No running containers to backup")
         return
     
-    print(f"Creating backups for {len(running_containers)} running containers...")
+    print(f"Creating backups for {len(running_containers)} running containers "
+          f"({max_workers} at a time)...")
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        backup_results = list(executor.map(
+            manager.backup_container,
+            [c['vmid'] for c in running_containers]
+        ))
     
     backups_created = []
-    for container in running_containers:
+    for container, backup_result in zip(running_containers, backup_results):
         vmid = container['vmid']
-        print(f"  Backing up container {vmid} ({container['name']})...")
-        
-        backup_result = manager.backup_container(vmid)
+        print(f"  Container {vmid} ({container['name']}):")
         
         if backup_result['success']:
             backups_created.append({
@@ -275,11 +267,12 @@ def main():
     ]
     
     results = {}
+    manager = DevContainerManager()
     
     for name, example_func in examples:
         try:
             print(f"\n{'='*20} {name} {'='*20}")
-            result = example_func()
+            result = example_func(manager)
             results[name] = result
         except Exception as e:
             print(f"❌ Example '{name}' failed: {str(e)}")
@@ -311,11 +304,18 @@ if __name__ == "__main__":
             'backup': example_backup_management
         }
         
-        if example_name in examples:
-            examples[example_name]()
+        if example_name == 'backup' and len(sys.argv) > 2:
+            # Optional concurrency: example_usage.py backup <max_workers>
+            if sys.argv[2].isdigit() and int(sys.argv[2]) > 0:
+                example_backup_management(DevContainerManager(), max_workers=int(sys.argv[2]))
+            else:
+                print("Usage: example_usage.py backup [max_workers]")
+        elif example_name in examples:
+            examples[example_name](DevContainerManager())
         else:
             print(f"Unknown example: {example_name}")
             print(f"Available examples: {', '.join(examples.keys())}")
+            print("Usage: example_usage.py backup [max_workers]")
     else:
         # Run all examples
         main()
\ No newline at end of file
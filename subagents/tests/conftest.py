@@ -0,0 +1,9 @@
+"""
+Shared pytest configuration for the DevContainer Manager tests
+"""
+
+import sys
+from pathlib import Path
+
+# Make the agent importable as devcontainer_manager for every test module
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -4,30 +4,293 @@ DevContainer Monitor - Mobile Responsive Web Dashboard
 Simple Flask application for monitoring LXC development containers.
 """
 
-from flask import Flask, render_template, jsonify, request
-from flask_socketio import SocketIO, emit
+import os
+
+# eventlet must patch the stdlib before anything else imports it. The worker
+# pool relies on real threads and processes, so it keeps the threading server.
+try:
+    if os.environ.get('USE_WORKER_POOL') == '1':
+        raise ImportError
+    import eventlet
+    eventlet.monkey_patch()
+    ASYNC_MODE = 'eventlet'
+except ImportError:
+    ASYNC_MODE = 'threading'
+
+from flask import Flask, Response, render_template, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import subprocess
+import hashlib
+import importlib.util
 import json
+import multiprocessing
+import re
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
-import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+AGENT_DIR = '/opt/lxc-dev-template/subagents'
+AGENT_SCRIPT = os.path.join(AGENT_DIR, 'devcontainer-manager.py')
+
+# Set USE_SUBPROCESS=1 to run every action through the agent CLI instead,
+# or USE_WORKER_POOL=1 to run them in long-lived agent worker processes
+USE_SUBPROCESS = os.environ.get('USE_SUBPROCESS') == '1'
+USE_WORKER_POOL = os.environ.get('USE_WORKER_POOL') == '1'
+
+def _load_manager():
+    """Load the agent script as a module and return a DevContainerManager."""
+    spec = importlib.util.spec_from_file_location('devcontainer_manager', AGENT_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.DevContainerManager()
+
+# Only the in-process path needs the manager in this process
+_mgr = None
+if not USE_SUBPROCESS and not USE_WORKER_POOL:
+    _mgr = _load_manager()
+
+# POST body for configure-opencode; provider names end up in a shell command
+_OPENCODE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'providers': {
+            'type': 'array',
+            'minItems': 1,
+            'items': {'type': 'string', 'pattern': r'^[a-z0-9][a-z0-9_-]*$'}
+        }
+    }
+}
+_PROVIDER_RE = re.compile(_OPENCODE_SCHEMA['properties']['providers']['items']['pattern'])
+
+def _check_opencode_body(data):
+    """Check a configure-opencode body against _OPENCODE_SCHEMA without fastjsonschema."""
+    if not isinstance(data, dict):
+        raise ValueError('data must be object')
+    providers = data.get('providers', ['anthropic'])
+    if not isinstance(providers, list) or not providers:
+        raise ValueError('data.providers must be a non-empty array')
+    # fullmatch: a bare match would let '$' accept a trailing newline
+    if not all(isinstance(p, str) and _PROVIDER_RE.fullmatch(p) for p in providers):
+        raise ValueError('data.providers must contain valid provider names')
+    return data
+
+# fastjsonschema's JsonSchemaException is a ValueError, like the fallback's errors
+if fastjsonschema is not None:
+    _validate_opencode = fastjsonschema.compile(_OPENCODE_SCHEMA)
+else:
+    _validate_opencode = _check_opencode_body
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+_json_dumpb = orjson.dumps if orjson is not None else (lambda obj: json.dumps(obj).encode())
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes and decodes with orjson."""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping a str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+class _OrjsonModule:
+    """json-module stand-in for Socket.IO packets, encoding with orjson."""
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        # orjson output is already compact, so separators and friends are moot
+        return orjson.dumps(obj).decode()
+    
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'devcontainer-monitor-secret'
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio_options = {}
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+    socketio_options['json'] = _OrjsonModule
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE, **socketio_options)
+
+def _dispatch(cmd_args):
+    """Run a DevContainer manager action in-process."""
+    action, args = cmd_args[0], cmd_args[1:]
+    if action == 'list':
+        return _mgr.list_containers()
+    elif action == 'list-detail':
+        return _mgr.list_containers_with_info()
+    elif action == 'info':
+        return _mgr.get_container_info(args[0])
+    elif action == 'monitor':
+        return _mgr.monitor_resources(args[0])
+    elif action == 'backup':
+        return _mgr.backup_container(args[0])
+    elif action == 'configure-opencode':
+        return _mgr.configure_opencode(args[0], args[1:] or None)
+    else:
+        return {'success': False, 'error': f'Unknown action: {action}'}
+
+def _init_worker():
+    """Give each pool worker its own DevContainerManager."""
+    global _mgr
+    _mgr = _load_manager()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    """Return the agent worker pool, starting it on first use.
+    
+    Workers are forked explicitly: under spawn or forkserver each child
+    would re-import this module while bootstrapping. Forking needs real
+    threads, so the pool cannot run under an eventlet server.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = multiprocessing.get_context('fork').Pool(os.cpu_count(), initializer=_init_worker)
+        return _pool
+
+# Read-only actions get a short budget so a stuck pct call cannot hold a
+# worker for long. Actions that change a container keep the long budget,
+# and backups (vzdump) are never cut off.
+READ_TIMEOUT = 2.5
+DETAIL_TIMEOUT = 10.0  # list-detail queries every container, so it gets more
+WRITE_TIMEOUT = 30.0
+_READ_ACTIONS = frozenset({'list', 'list-detail', 'info', 'monitor'})
+_UNBOUNDED_ACTIONS = frozenset({'backup'})
+
+# In-process reads run here so they can be abandoned after their budget;
+# the manager's own per-command timeout eventually frees the thread
+_read_executor = ThreadPoolExecutor(max_workers=16)
+
+# Reads still running, by argv; callers join these rather than starting more
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def _timeout_for(action):
+    """Return the time budget for an agent action, None meaning unbounded."""
+    if action == 'list-detail':
+        return DETAIL_TIMEOUT
+    if action in _READ_ACTIONS:
+        return READ_TIMEOUT
+    if action in _UNBOUNDED_ACTIONS:
+        return None
+    return WRITE_TIMEOUT
+
+def _timed_out(cmd_args):
+    """Return the last good container list marked stale, or a timeout error."""
+    cache = _LIST_CACHES.get(cmd_args[0])
+    if cache is not None and cache['v'] is not None:
+        return dict(cache['v'], stale=True)
+    return {'success': False, 'error': 'Command timed out'}
+
+def _start_read(cmd_args):
+    """Start a read on the worker pool or the read executor and return its future."""
+    if USE_WORKER_POOL:
+        future = Future()
+        _get_pool().apply_async(_dispatch, (cmd_args,), callback=future.set_result,
+                                error_callback=future.set_exception)
+        return future
+    return _read_executor.submit(_dispatch, cmd_args)
+
+def _finish_read(key, future):
+    """Forget a finished read and keep a container list even if its caller gave up."""
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    cache = _LIST_CACHES.get(key[0])
+    if cache is not None and future.exception() is None and isinstance(future.result(), list):
+        cache.update(t=time.monotonic(), v={'success': True, 'containers': future.result()})
+
+def _run_read(cmd_args, timeout):
+    """Run a read action, joining an identical one that is still in flight."""
+    key = tuple(cmd_args)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        started = future is None
+        if started:
+            future = _inflight[key] = _start_read(cmd_args)
+    if started:
+        # Added outside the lock: a future that is already done calls back at once
+        future.add_done_callback(lambda done: _finish_read(key, done))
+    return future.result(timeout=timeout)
 
 def run_agent_command(cmd_args):
     """Execute DevContainer manager command and return JSON result."""
+    timeout = _timeout_for(cmd_args[0])
     try:
-        cmd = ['/opt/lxc-dev-template/subagents/devcontainer-manager.py'] + cmd_args
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        if result.returncode == 0:
-            return json.loads(result.stdout)
+        if USE_SUBPROCESS:
+            cmd = [AGENT_SCRIPT] + cmd_args
+            # Keep stdout as bytes; both json and orjson parse it directly.
+            # An absolute executable with close_fds=False lets subprocess use
+            # posix_spawn rather than forking the whole server process.
+            result = subprocess.run(cmd, capture_output=True, timeout=timeout, close_fds=False)
+            if result.returncode != 0:
+                return {'success': False, 'error': result.stderr.decode('utf-8', 'replace')}
+            result = _json_loads(result.stdout)
+        elif cmd_args[0] in _READ_ACTIONS:
+            result = _run_read(cmd_args, timeout)
+        elif USE_WORKER_POOL:
+            result = _get_pool().apply_async(_dispatch, (cmd_args,)).get(timeout=timeout)
         else:
-            return {'success': False, 'error': result.stderr}
+            # Writes run to completion rather than being abandoned half-way
+            result = _dispatch(cmd_args)
+        
+        # The agent lists containers as a bare array
+        if isinstance(result, list):
+            return {'success': True, 'containers': result}
+        return result
+    except (subprocess.TimeoutExpired, multiprocessing.TimeoutError, FutureTimeoutError):
+        return _timed_out(cmd_args)
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
+# Short-lived container list shared by every endpoint and WebSocket client
+POLL_INTERVAL = 5  # seconds between container list broadcasts
+MONITOR_INTERVAL = 5  # seconds between per-container metrics broadcasts
+
+_list_cache = {'t': 0.0, 'v': None}
+_detail_cache = {'t': 0.0, 'v': None}
+_list_lock = threading.Lock()
+_detail_lock = threading.Lock()
+# Cache each list action's result belongs in
+_LIST_CACHES = {'list': _list_cache, 'list-detail': _detail_cache}
+
+def _cached_list(ttl=1.5, detail=False):
+    """Return the container list, reusing a result younger than ttl seconds.
+    
+    With detail, each container also carries its info from one batched
+    agent call. Concurrent callers wait on the lock and share a single fetch;
+    each cache has its own lock so a slow detail fetch never stalls the list.
+    """
+    cache, lock = (_detail_cache, _detail_lock) if detail else (_list_cache, _list_lock)
+    with lock:
+        if cache['v'] is not None and time.monotonic() - cache['t'] < ttl:
+            return cache['v']
+        
+        containers = run_agent_command(['list-detail' if detail else 'list'])
+        if containers.get('success') and not containers.get('stale'):
+            cache.update(t=time.monotonic(), v=containers)
+        return containers
+
 @app.route('/')
 def dashboard():
     """Main dashboard - mobile responsive container monitoring."""
@@ -35,9 +298,10 @@ def dashboard():
 
 @app.route('/api/containers')
 def get_containers():
-    """API endpoint to get all containers."""
+    """API endpoint to get all containers, with per-container info if ?detail=1."""
     try:
-        return jsonify(run_agent_command(['list']))
+        detail = request.args.get('detail') in ('1', 'true')
+        return jsonify(_cached_list(detail=detail))
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -75,7 +339,7 @@ def restart_container(vmid):
 
 @app.route('/api/container/<vmid>/monitor')
 def monitor_container(vmid):
-    """API endpoint to get container resources."""
+    """API endpoint for a one-shot resource query; subscribe_monitor streams them."""
     try:
         return jsonify(run_agent_command(['monitor', vmid]))
     except Exception as e:
@@ -85,43 +349,57 @@ def monitor_container(vmid):
 def configure_opencode(vmid):
     """API endpoint to configure OpenCode."""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        try:
+            _validate_opencode(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         providers = data.get('providers', ['anthropic'])
         return jsonify(run_agent_command(['configure-opencode', vmid] + providers))
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+# Constant parts of the health response; only the timestamp changes per hit
+_HEALTH_PREFIX = b'{"status":"healthy","version":"1.0.0","timestamp":"'
+_HEALTH_SUFFIX = b'"}'
+
 @app.route('/api/health')
 def health_check():
     """API health check endpoint."""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
-    })
+    body = _HEALTH_PREFIX + datetime.now().isoformat().encode() + _HEALTH_SUFFIX
+    return Response(body, mimetype='application/json')
 
 @socketio.on('connect')
 def handle_connect():
     """Handle WebSocket connection."""
     print(f'Client connected: {request.sid}')
-    # Send current containers immediately
-    try:
-        containers = run_agent_command(['list'])
-        if containers.get('containers'):
-            emit('containers_update', containers.get('containers'))
-    except Exception as e:
-        print(f'Error sending initial data: {e}')
+    _start_poller()
+    # Send the poller's last snapshot immediately; no agent call on connect
+    containers = _list_cache['v']
+    if containers and containers.get('containers'):
+        emit('containers_update', containers.get('containers'))
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle WebSocket disconnection."""
     print(f'Client disconnected: {request.sid}')
+    _sent_hash.pop(request.sid, None)
+    with _monitor_lock:
+        for sids in _monitor_subs.values():
+            sids.discard(request.sid)
+
+# Digest of the container list each client last received from a refresh
+_sent_hash = {}
+
+def _list_digest(containers):
+    """Return a short digest identifying a container list."""
+    return hashlib.blake2b(_json_dumpb(containers), digest_size=8).digest()
 
 @socketio.on('request_containers')
 def handle_request_containers():
     """Handle request for container list via WebSocket."""
     try:
-        containers = run_agent_command(['list'])
+        containers = _cached_list()
         if containers.get('containers'):
             emit('containers_update', containers.get('containers'))
     except Exception as e:
@@ -131,13 +409,88 @@ def handle_request_containers():
 def handle_refresh_containers():
     """Handle manual refresh request."""
     try:
-        containers = run_agent_command(['list'])
+        containers = _cached_list()
         if containers.get('containers'):
-            emit('containers_update', containers.get('containers'))
+            # Skip re-sending a list this client already has
+            digest = _list_digest(containers['containers'])
+            if _sent_hash.get(request.sid) != digest:
+                emit('containers_update', containers['containers'])
+                _sent_hash[request.sid] = digest
             emit('notification', {'message': 'Container list refreshed', 'type': 'success'})
     except Exception as e:
         emit('error', {'message': str(e), 'type': 'error'})
 
+# Subscribed client sids per monitored vmid
+_monitor_subs = {}
+_monitor_lock = threading.Lock()
+_monitor_started = False
+
+@socketio.on('subscribe_monitor')
+def handle_subscribe_monitor(vmid):
+    """Stream resource metrics for a container to this client."""
+    global _monitor_started
+    vmid = str(vmid)
+    if not vmid.isdigit():
+        emit('error', {'message': f'Invalid container id: {vmid}', 'type': 'error'})
+        return
+    join_room(f'mon:{vmid}')
+    with _monitor_lock:
+        _monitor_subs.setdefault(vmid, set()).add(request.sid)
+        if not _monitor_started:
+            socketio.start_background_task(_poll_monitors)
+            _monitor_started = True
+
+@socketio.on('unsubscribe_monitor')
+def handle_unsubscribe_monitor(vmid):
+    """Stop streaming resource metrics for a container to this client."""
+    vmid = str(vmid)
+    leave_room(f'mon:{vmid}')
+    with _monitor_lock:
+        _monitor_subs.get(vmid, set()).discard(request.sid)
+
+def _poll_monitors(interval=MONITOR_INTERVAL):
+    """Collect metrics once per subscribed container and emit them to its room."""
+    while True:
+        with _monitor_lock:
+            for vmid in [vmid for vmid, sids in _monitor_subs.items() if not sids]:
+                del _monitor_subs[vmid]
+            vmids = list(_monitor_subs)
+        
+        if vmids:
+            # Query every subscribed container concurrently, like list_containers
+            with ThreadPoolExecutor(max_workers=min(16, len(vmids))) as executor:
+                results = list(executor.map(lambda vmid: run_agent_command(['monitor', vmid]), vmids))
+            for vmid, metrics in zip(vmids, results):
+                try:
+                    socketio.emit('metrics', dict(metrics, vmid=vmid), room=f'mon:{vmid}', namespace='/')
+                except Exception as e:
+                    print(f'Error monitoring container {vmid}: {e}')
+        socketio.sleep(interval)
+
+_poller_lock = threading.Lock()
+_poller_started = False
+
+def _start_poller():
+    """Start the container poller once, whichever server runs the app."""
+    global _poller_started
+    with _poller_lock:
+        if not _poller_started:
+            socketio.start_background_task(_poll_containers)
+            _poller_started = True
+
+def _poll_containers(interval=POLL_INTERVAL):
+    """Refresh the container list and broadcast it to every connected client."""
+    while True:
+        try:
+            containers = _cached_list()
+            if containers.get('containers'):
+                socketio.emit('containers_update', containers.get('containers'), namespace='/')
+                # Every client now holds this list
+                _sent_hash.update(dict.fromkeys(_sent_hash, _list_digest(containers['containers'])))
+        except Exception as e:
+            print(f'Error polling containers: {e}')
+        socketio.sleep(interval)
+
 if __name__ == '__main__':
     # Create logs directory
     os.makedirs('/opt/lxc-dev-template/web/logs', exist_ok=True)
@@ -148,4 +501,5 @@ if __name__ == '__main__':
     print("🌐 WebSocket connectivity enabled")
     print("📊 Open http://localhost:8080 to access")
     
+    _start_poller()
     socketio.run(app, host='0.0.0.0', port=8080, debug=False, allow_unsafe_werkzeug=True)
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""
+Shared pytest configuration for the web dashboard tests
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Run agent actions through the CLI so importing app does not need the
+# manager installed under /opt; tests stub run_agent_command instead
+os.environ.setdefault('USE_SUBPROCESS', '1')
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test suite for the DevContainer Monitor web dashboard
+"""
+
+import unittest
+from unittest import mock
+
+import app
+
+class TestConfigureOpencodeValidation(unittest.TestCase):
+    """Test cases for configure-opencode body validation."""
+    
+    def test_fallback_accepts_valid_bodies(self):
+        """Test provider lists and a missing providers key pass."""
+        for body in ({'providers': ['anthropic', 'openai']}, {'providers': ['open-router_2']}, {}):
+            self.assertEqual(app._check_opencode_body(body), body)
+    
+    def test_fallback_rejects_malformed_bodies(self):
+        """Test non-objects, empty or non-list providers and unsafe names fail."""
+        bodies = [
+            None,
+            ['anthropic'],
+            {'providers': []},
+            {'providers': 'anthropic'},
+            {'providers': [1]},
+            {'providers': ['anthropic\n']},
+            {'providers': ['x; rm -rf /']},
+            {'providers': ['$(id)']},
+            {'providers': ['-rf']},
+        ]
+        for body in bodies:
+            with self.assertRaises(ValueError, msg=repr(body)):
+                app._check_opencode_body(body)
+    
+    def test_endpoint_returns_400_on_invalid_body(self):
+        """Test invalid bodies are rejected before the agent is called."""
+        client = app.app.test_client()
+        with mock.patch.object(app, '_validate_opencode', app._check_opencode_body), \
+                mock.patch.object(app, 'run_agent_command', return_value={'success': True}) as run:
+            response = client.post('/api/container/1001/configure-opencode',
+                                   json={'providers': ['anthropic\n']})
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.get_json()['success'])
+            run.assert_not_called()
+            
+            response = client.post('/api/container/1001/configure-opencode',
+                                   json={'providers': ['anthropic']})
+            self.assertEqual(response.status_code, 200)
+            run.assert_called_once_with(['configure-opencode', '1001', 'anthropic'])